@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Indici secondari precalcolati per i lookup del frontend
+Sostituiscono le scansioni lineari di filterHotelsByZone, groupHotelsByZoneAndBudget,
+getItinerariPerDestinazione e findItinerarioByZone con accessi a dizionario.
+Ogni indice mappa una chiave → lista di CODICE, nell'ordine delle righe del CSV.
+
+Uso (dopo la conversione):
+    python build_lookup_indexes.py --data public/data
+oppure direttamente:
+    python convert_excel_to_csv.py --indexes
+"""
+
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from catalog_links import EMPTY_VALUES, find_link_families, melt_links, read_data_csv
+from catalog_schema import coerce_frames
+
+INDEXES_FILE = "lookup_indexes.json"
+
+# Separatore per le chiavi composte (es. set di zone di un itinerario)
+KEY_SEPARATOR = "|"
+
+
+def normalize_key(series):
+    """Stessa normalizzazione del frontend: maiuscolo e trim"""
+    return series.astype("string").str.upper().str.strip()
+
+
+def group_codes(df, by):
+    """{chiave: [CODICE, ...]} escludendo chiavi vuote (placeholder o NA) e righe senza CODICE"""
+    df = df[df[by].notna() & ~df[by].isin(EMPTY_VALUES) & df["CODICE"].notna()]
+    return df.groupby(by, sort=False, observed=True)["CODICE"].agg(list).to_dict()
+
+
+def hotels_by_zone_and_budget(hotels):
+    """{ZONA: {BUDGET: [CODICE, ...]}} — il primo codice è quello scelto dal frontend"""
+    df = pd.DataFrame({
+        "ZONA": normalize_key(hotels["ZONA"]),
+        "BUDGET": hotels["BUDGET"].astype("string").str.strip(),
+        "CODICE": hotels["CODICE"],
+    })
+    df = df.dropna()
+    df = df[~df["ZONA"].isin(EMPTY_VALUES) & ~df["BUDGET"].isin(EMPTY_VALUES)]
+    grouped = df.groupby(["ZONA", "BUDGET"], sort=False)["CODICE"].agg(list)
+    index = {}
+    for (zona, budget), codes in grouped.items():
+        index.setdefault(zona, {})[budget] = codes
+    return index
+
+
+def experiences_by_zone(experiences):
+    """{ZONA: [CODICE, ...]}"""
+    return group_codes(experiences.assign(ZONA=normalize_key(experiences["ZONA"])), "ZONA")
+
+
+def experiences_by_category(experiences):
+    """{categoria: [CODICE, ...]} unendo CATEGORIA_1..n"""
+    columns = [col for col in experiences.columns if col.startswith("CATEGORIA_")]
+    long = experiences.assign(RIGA=range(len(experiences))).melt(
+        id_vars=["CODICE", "RIGA"], value_vars=columns, value_name="CATEGORIA"
+    )
+    long["CATEGORIA"] = long["CATEGORIA"].astype("string").str.strip()
+    # Ordine delle righe del CSV, senza duplicati se una categoria compare due volte
+    long = long.sort_values("RIGA", kind="stable").drop_duplicates(["CODICE", "CATEGORIA"])
+    return group_codes(long, "CATEGORIA")
+
+
+def itineraries_by_zone_set(itineraries):
+    """
+    {ZONA_A|ZONA_B|...: [CODICE, ...]} con le zone ordinate alfabeticamente
+    Il frontend costruisce la chiave ordinando le zone selezionate (match esatto del set).
+    """
+    zones = find_link_families(itineraries.columns).get("ZONA", [])
+    links = melt_links(itineraries, zones)
+    key = (
+        links.drop_duplicates(["CODICE", "CODICE_COLLEGATO"])
+        .sort_values(["CODICE", "CODICE_COLLEGATO"])
+        .groupby("CODICE", sort=False)["CODICE_COLLEGATO"]
+        .agg(KEY_SEPARATOR.join)
+        .rename("ZONE")
+    )
+    df = itineraries[["CODICE"]].join(key, on="CODICE")
+    return group_codes(df.fillna({"ZONE": ""}), "ZONE")
+
+
+def itineraries_by_destination(itineraries):
+    """{DESTINAZIONE: [CODICE, ...]}"""
+    return group_codes(
+        itineraries.assign(DESTINAZIONE=normalize_key(itineraries["DESTINAZIONE"])), "DESTINAZIONE"
+    )
+
+
+def extras_by_linked_code(extras):
+    """{CODICE_COLLEGATO: [CODICE extra, ...]}"""
+    return group_codes(
+        extras.assign(CODICE_COLLEGATO=extras["CODICE_COLLEGATO"].astype("string").str.strip()),
+        "CODICE_COLLEGATO"
+    )
+
+
+def build_indexes(frames):
+    """Costruisce tutti gli indici da {nome_foglio: DataFrame} (fogli mancanti saltati)"""
+    builders = [
+        ("hotel_per_zona_budget", "hotel_tech", hotels_by_zone_and_budget),
+        ("esperienze_per_zona", "esperienze_tech", experiences_by_zone),
+        ("esperienze_per_categoria", "esperienze_tech", experiences_by_category),
+        ("itinerari_per_zone", "itinerario_tech", itineraries_by_zone_set),
+        ("itinerari_per_destinazione", "itinerario_tech", itineraries_by_destination),
+        ("extra_per_codice_collegato", "extra_tech", extras_by_linked_code),
+    ]
+    return {
+        name: build(frames[sheet_name])
+        for name, sheet_name, build in builders
+        if sheet_name in frames
+    }
+
+
+def write_indexes(indexes, output_dir):
+    """Scrive lookup_indexes.json accanto ai CSV"""
+    path = os.path.join(output_dir, INDEXES_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(indexes, f, ensure_ascii=False, separators=(',', ':'))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera gli indici di lookup dai CSV convertiti")
+    parser.add_argument("--data", default="public/data", help="Directory dei CSV")
+    args = parser.parse_args()
+
+    frames = {}
+    for sheet_name in ["hotel_tech", "esperienze_tech", "itinerario_tech", "extra_tech"]:
+        csv_path = os.path.join(args.data, f"{sheet_name}.csv")
+        if os.path.exists(csv_path):
+            frames[sheet_name] = read_data_csv(args.data, sheet_name)
+        else:
+            print(f"⚠️  {csv_path} non trovato, skip")
+
+    # I CSV hanno i placeholder di fill_placeholders ('0' in BUDGET, TBD in CODICE):
+    # tipizzati come in convert_excel_to_csv diventano NA e restano fuori dagli indici
+    frames, _ = coerce_frames(frames)
+    indexes = build_indexes(frames)
+    path = write_indexes(indexes, args.data)
+
+    print(f"📇 Indici di lookup → {path}")
+    for name, index in indexes.items():
+        print(f"   ✅ {name}: {len(index)} chiavi")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Famiglie di colonne di collegamento ripetute (EXTRA_1..15, COSTI_ACC_1..15,
+VOLO_1..8, HOTEL_1..3, ZONA_1..6)
+Helper condivisi per normalizzarle in coppie (CODICE, codice collegato).
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Prefissi delle famiglie di colonne numerate
+LINK_FAMILIES = ["EXTRA", "COSTI_ACC", "VOLO", "HOTEL", "ZONA"]
+
+FAMILY_PATTERN = re.compile(rf"^({'|'.join(LINK_FAMILIES)})_(\d+)$")
+
+# Valori che indicano uno slot vuoto (stessi filtri usati dal frontend + placeholder)
+EMPTY_VALUES = ["", "nd", "None", "TBD", "PENDING"]
+
+
+def find_link_families(columns):
+    """
+    Raggruppa le colonne numerate per famiglia
+    Ritorna {famiglia: [colonne ordinate per slot]}, es. {"VOLO": ["VOLO_1", ...]}
+    """
+    families = {}
+    for col in columns:
+        match = FAMILY_PATTERN.match(col)
+        if match:
+            families.setdefault(match.group(1), []).append((int(match.group(2)), col))
+    return {
+        family: [col for _, col in sorted(slots)]
+        for family, slots in families.items()
+    }
+
+
+def melt_links(df, columns, key="CODICE"):
+    """
+    Trasforma una famiglia larga in righe (CODICE, POSIZIONE, CODICE_COLLEGATO)
+    Gli slot vuoti (placeholder o NA nei fogli tipizzati) vengono scartati;
+    POSIZIONE parte da 1.
+    """
+    values = df[columns].astype("string").set_axis(range(1, len(columns) + 1), axis=1)
+    values.index = df[key].to_numpy()
+    links = values.stack().rename_axis([key, "POSIZIONE"]).reset_index(name="CODICE_COLLEGATO")
+    links = links[links["CODICE_COLLEGATO"].notna()]
+    links = links[~links["CODICE_COLLEGATO"].str.strip().isin(EMPTY_VALUES)]
+    return links.reset_index(drop=True)
+
+
+# Colonne singole che contengono il CODICE di un'altra entità
+LINK_COLUMNS = ["CODICE_COLLEGATO", "ZONA_COLLEGATA", "DESTINAZIONE_COLLEGATA", "DEST_ABBINATA_1"]
+
+# Foglio a cui punta ogni famiglia / colonna di link
+# (CODICE_COLLEGATO degli extra può puntare a qualsiasi foglio tech)
+LINK_TARGETS = {
+    "EXTRA": "extra_tech",
+    "COSTI_ACC": "costi_accessori_tech",
+    "VOLO": "voli_tech",
+    "HOTEL": "hotel_tech",
+    "ZONA": "zone_tech",
+    "ZONA_COLLEGATA": "zone_tech",
+    "DESTINAZIONE_COLLEGATA": "destinazioni_tech",
+    "DEST_ABBINATA_1": "destinazioni_tech",
+    "CODICE_COLLEGATO": None,
+}
+
+
+def known_codes_for(target, codes_by_sheet):
+    """CODICE validi per un link: quelli del foglio di destinazione, o di tutti i fogli tech"""
+    if target is not None:
+        return codes_by_sheet.get(target, frozenset())
+    return frozenset().union(*(
+        codes for sheet_name, codes in codes_by_sheet.items() if sheet_name.endswith("_tech")
+    ))
+
+
+def find_broken_links(df, sheet_name, codes_by_sheet):
+    """
+    Link che puntano a un CODICE inesistente nel foglio tech di destinazione
+    codes_by_sheet è {nome_foglio: insieme dei CODICE}; i fogli copy non contano,
+    così un codice rimosso da hotel_tech è rotto anche se resta in hotel_copy.
+    Ritorna un DataFrame (FOGLIO, CODICE, COLONNA, CODICE_COLLEGATO).
+    """
+    if "CODICE" not in df.columns:
+        return pd.DataFrame(columns=["FOGLIO", "CODICE", "COLONNA", "CODICE_COLLEGATO"])
+
+    parts = []
+    for family, columns in find_link_families(df.columns).items():
+        links = melt_links(df, columns)
+        links["COLONNA"] = family + "_" + links["POSIZIONE"].astype(str)
+        parts.append(links.drop(columns="POSIZIONE").assign(TARGET=family))
+    for col in LINK_COLUMNS:
+        if col in df.columns:
+            links = df[["CODICE", col]].astype("string").rename(columns={col: "CODICE_COLLEGATO"})
+            links = links[links["CODICE_COLLEGATO"].notna()]
+            links = links[~links["CODICE_COLLEGATO"].str.strip().isin(EMPTY_VALUES)]
+            parts.append(links.assign(COLONNA=col, TARGET=col))
+
+    links = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=["CODICE", "CODICE_COLLEGATO", "COLONNA", "TARGET"])
+    valid = np.zeros(len(links), dtype=bool)
+    for target, rows in links.groupby("TARGET", sort=False).indices.items():
+        known_codes = known_codes_for(LINK_TARGETS[target], codes_by_sheet)
+        valid[rows] = links["CODICE_COLLEGATO"].iloc[rows].str.strip().isin(known_codes).to_numpy()
+    broken = links[~valid]
+    return broken.assign(FOGLIO=sheet_name)[["FOGLIO", "CODICE", "COLONNA", "CODICE_COLLEGATO"]]
+
+
+# Formati di output per le famiglie di link
+#   wide      → colonne originali (compatibile con Excel e frontend attuale)
+#   list      → una colonna <FAMIGLIA>_LIST con i codici separati da LIST_SEPARATOR
+#   adjacency → colonne rimosse dal CSV, offsets + codes in <foglio>.links.json
+LINK_FORMATS = ["wide", "list", "adjacency"]
+LIST_SEPARATOR = "|"
+SLOT_PLACEHOLDER = "nd"
+SCHEMA_FILE = "links_schema.json"
+
+
+def adjacency_arrays(df, columns):
+    """
+    Comprime una famiglia in (offsets, codes) stile CSR
+    I codici della riga i sono codes[offsets[i]:offsets[i + 1]], in ordine di slot.
+    """
+    values = df[columns].to_numpy(dtype=object)
+    mask = ~df[columns].apply(lambda col: col.str.strip()).isin(EMPTY_VALUES).to_numpy()
+    codes = values[mask]
+    offsets = np.concatenate([[0], np.cumsum(mask.sum(axis=1))])
+    return offsets, codes
+
+
+def split_rows(codes, offsets):
+    """Lista dei codici per riga a partire da (offsets, codes)"""
+    return [list(codes[start:end]) for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def collapse_links(df, link_format, sheet_name):
+    """
+    Applica il formato compatto alle famiglie di link di un foglio
+    Ritorna (DataFrame, descrittore del foglio o None, {famiglia: {offsets, codes}})
+    """
+    families = find_link_families(df.columns)
+    if link_format == "wide" or not families:
+        return df, None, {}
+
+    descriptor = {"columns": list(df.columns), "families": {}}
+    adjacency = {}
+    df = df.copy()
+
+    for family, columns in families.items():
+        offsets, codes = adjacency_arrays(df, columns)
+        entry = {"slots": columns, "format": link_format}
+
+        if link_format == "list":
+            column = f"{family}_LIST"
+            lists = [LIST_SEPARATOR.join(row) for row in split_rows(codes, offsets)]
+            df.insert(df.columns.get_loc(columns[0]), column, lists)
+            entry["column"] = column
+        else:
+            adjacency[family] = {"offsets": offsets.tolist(), "codes": codes.tolist()}
+            entry["file"] = f"{sheet_name}.links.json"
+
+        df = df.drop(columns=columns)
+        descriptor["families"][family] = entry
+
+    return df, descriptor, adjacency
+
+
+def expand_links(df, sheet_descriptor, adjacency=None):
+    """
+    Ricostruisce le colonne larghe da un foglio compatto
+    sheet_descriptor è la voce del foglio in links_schema.json;
+    adjacency il contenuto di <foglio>.links.json (solo per formato adjacency).
+    Gli slot vuoti tornano a SLOT_PLACEHOLDER e i codici occupano i primi slot.
+    """
+    df = df.copy()
+    for family, entry in sheet_descriptor["families"].items():
+        if entry["format"] == "list":
+            lists = [value.split(LIST_SEPARATOR) if value else [] for value in df[entry["column"]]]
+        else:
+            lists = split_rows(adjacency[family]["codes"], adjacency[family]["offsets"])
+
+        slots = entry["slots"]
+        wide = pd.DataFrame(lists, index=df.index).reindex(columns=range(len(slots)))
+        df[slots] = wide.fillna(SLOT_PLACEHOLDER).to_numpy()
+
+    return df[sheet_descriptor["columns"]]
+
+
+def read_data_csv(data_dir, sheet_name):
+    """
+    Legge <foglio>.csv da una directory di output della conversione
+    Se links_schema.json descrive il foglio (formato list/adjacency) ricostruisce
+    le colonne larghe, così gli script standalone vedono sempre EXTRA_n, ZONA_n...
+    """
+    df = pd.read_csv(os.path.join(data_dir, f"{sheet_name}.csv"), dtype=str, na_filter=False)
+    schema_path = os.path.join(data_dir, SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        return df
+    with open(schema_path, encoding='utf-8') as f:
+        descriptor = json.load(f)["sheets"].get(sheet_name)
+    if descriptor is None:
+        return df
+
+    adjacency = None
+    links_path = os.path.join(data_dir, f"{sheet_name}.links.json")
+    if os.path.exists(links_path):
+        with open(links_path, encoding='utf-8') as f:
+            adjacency = json.load(f)
+    return expand_links(df, descriptor, adjacency)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Schema dichiarativo per foglio: dtype, nullabilità ed enum di ogni colonna
+Estende COLUMN_MAPPING (e le colonne dei fogli solo tech) con regole per nome
+colonna. coerce_frames converte ogni colonna una sola volta con cast vettoriali
+e raccoglie in blocco le celle non valide con le loro coordinate Excel.
+
+Tipi:
+    code     → string (codici e link, es. XTHBA01, CONTATORE "01")
+    text     → string, o category se a bassa cardinalità
+    category → category (con categorie fisse se c'è un enum)
+    int      → Int64
+    float    → Float64
+    bool     → boolean (si/no)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from catalog_links import EMPTY_VALUES, LINK_COLUMNS, LINK_FAMILIES
+from generate_excel_from_csv import COLUMN_MAPPING
+
+# Valori trattati come cella vuota (NA) prima del cast
+NULL_VALUES = EMPTY_VALUES
+
+# Testo libero con meno valori distinti di questa frazione delle righe → category
+LOW_CARDINALITY_RATIO = 0.5
+
+TIPO_CODES = {
+    "destinazioni": "D", "zone": "Z", "esperienze": "X", "hotel": "H",
+    "voli": "V", "itinerario": "I", "costi_accessori": "A", "extra": "E",
+}
+BUDGET_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+LIVELLO_PLUS_VALUES = ["esperienze", "hotel", "itinerario", "zone"]
+BOOL_VALUES = {"si": True, "sì": True, "yes": True, "true": True, "no": False, "false": False}
+
+PANDAS_DTYPES = {
+    "code": "string", "text": "string", "int": "Int64", "float": "Float64", "bool": "boolean",
+}
+
+MONTHS = ["GENNAIO", "FEBBRAIO", "MARZO", "APRILE", "MAGGIO", "GIUGNO", "LUGLIO",
+          "AGOSTO", "SETTEMBRE", "OTTOBRE", "NOVEMBRE", "DICEMBRE"]
+
+
+def slots(prefix, count):
+    return [f"{prefix}_{i}" for i in range(1, count + 1)]
+
+
+# Colonne dei fogli solo tech (TECH_ONLY_SHEETS non sono in COLUMN_MAPPING)
+TECH_ONLY_COLUMNS = {
+    "voli": [
+        "CODICE", "TIPO", "DESTINAZIONE", "ZONA", "APT_PARTENZA", "APT_ARRIVO",
+        "NUMERO_VOLO", "BUDGET", "SERVIZI_MINIMI",
+        *[f"PRZ_PAX_FLIGHT_{month}{half}" for month in MONTHS for half in (1, 2)],
+        *slots("EXTRA", 15)
+    ],
+    "itinerario": [
+        "CODICE", "TIPO", "DESTINAZIONE", "ZONA", "CONTATORE_ZONA",
+        *slots("ZONA", 6), "MIN_NOTTI", *slots("COSTI_ACC", 15), *slots("EXTRA", 15)
+    ],
+    "costi_accessori": [
+        "CODICE", "TIPO", "DESTINAZIONE", "SERVIZIO", "CONTATORE_DESTINAZIONE",
+        "DESCRIZIONE", "COSTO"
+    ],
+    "extra": [
+        "CODICE", "TIPO", "DESTINAZIONE", "ZONA", "CONTATORE_AREA", "PLUS",
+        "LIVELLO_PLUS", "SUPPLEMENTO", "COSTO_SUPPLEMENTO", "CODICE_COLLEGATO"
+    ],
+}
+
+
+def column(dtype, nullable=True, enum=None):
+    return {"dtype": dtype, "nullable": nullable, "enum": enum}
+
+
+# Regole per nome colonna, la prima che corrisponde vince
+COLUMN_RULES = [
+    (r"^CODICE$", column("code", nullable=False)),
+    (r"^BUDGET$", column("category", enum=BUDGET_LEVELS)),
+    (r"^LIVELLO_PLUS$", column("category", enum=LIVELLO_PLUS_VALUES)),
+    (r"^VISTO_RICHIESTO$", column("bool")),
+    (r"^COORDINATE_(LAT|LNG)$", column("float")),
+    (r"^(PRZ_PAX_|PRX_PAX$|COSTO|SUPPLEMENTO$)", column("float")),
+    (r"^(GIORNI_CONSIGLIATI|DISTANZA_CAPITALE_KM|MIN_NOTTI|DIFFICOLTA|SLOT)$", column("int")),
+    (r"^(CONTATORE_|PRIORITA$|DAY\d+_ESPERIENZA)", column("code")),
+    (rf"^(({'|'.join(LINK_FAMILIES)})_\d+|{'|'.join(LINK_COLUMNS)})$", column("code")),
+    (r"^(DESTINAZIONE|ZONA|CATEGORIA_\d+|CONTINENTE|VALUTA|LINGUA|TIMEZONE|TIPO_AREA"
+     r"|SERVIZIO|APT_PARTENZA|APT_ARRIVO)$", column("category")),
+]
+COLUMN_RULES = [(re.compile(pattern), spec) for pattern, spec in COLUMN_RULES]
+
+
+def column_spec(col, entity):
+    """Spec di una colonna: TIPO ha l'enum dell'entità, poi le regole, poi testo"""
+    if col == "TIPO":
+        code = TIPO_CODES.get(entity)
+        return column("category", nullable=False, enum=[code] if code else None)
+    for pattern, spec in COLUMN_RULES:
+        if pattern.match(col):
+            return spec
+    return column("text")
+
+
+def build_schema():
+    """{nome_foglio: {colonna: spec}} per tutti i fogli noti"""
+    sheets = {
+        f"{entity}_{kind}": columns
+        for entity, kinds in COLUMN_MAPPING.items()
+        for kind, columns in kinds.items()
+    }
+    sheets.update({f"{entity}_tech": columns for entity, columns in TECH_ONLY_COLUMNS.items()})
+    return {
+        sheet_name: {col: column_spec(col, sheet_name.rpartition('_')[0]) for col in columns}
+        for sheet_name, columns in sheets.items()
+    }
+
+
+SCHEMA = build_schema()
+
+
+def sheet_schema(sheet_name, columns):
+    """Spec per le colonne effettive del foglio (le colonne nuove seguono le regole)"""
+    declared = SCHEMA.get(sheet_name, {})
+    entity = sheet_name.rpartition('_')[0]
+    return {col: declared.get(col) or column_spec(col, entity) for col in columns}
+
+
+def coerce_column(values, spec):
+    """
+    Cast vettoriale di una colonna di stringhe
+    Ritorna (Series tipizzata, maschera celle non valide, maschera celle vuote)
+    """
+    raw = values.astype("string").str.strip()
+    null = (raw.isna() | raw.isin(NULL_VALUES)).to_numpy(dtype=bool)
+    present = raw.mask(null)
+    dtype = spec["dtype"]
+
+    if dtype in ("int", "float"):
+        numbers = pd.to_numeric(present.str.replace(",", ".", regex=False), errors="coerce")
+        invalid = ~null & numbers.isna().to_numpy()
+        if dtype == "int":
+            invalid |= (numbers.notna() & (numbers % 1 != 0)).to_numpy()
+        typed = numbers.mask(invalid).astype(PANDAS_DTYPES[dtype])
+    elif dtype == "bool":
+        typed = present.str.lower().map(BOOL_VALUES).astype("boolean")
+        invalid = ~null & typed.isna().to_numpy()
+    elif dtype == "category" and spec["enum"]:
+        invalid = ~null & ~present.isin(spec["enum"]).to_numpy()
+        typed = pd.Series(pd.Categorical(present.mask(invalid), categories=spec["enum"]),
+                          index=values.index)
+    elif dtype == "category" or (
+        dtype == "text" and present.nunique() < LOW_CARDINALITY_RATIO * len(present)
+    ):
+        typed = present.astype("category")
+        invalid = np.zeros(len(values), dtype=bool)
+    else:
+        typed = present
+        invalid = np.zeros(len(values), dtype=bool)
+
+    return typed, invalid, null
+
+
+def expected_label(spec):
+    """Descrizione leggibile del valore atteso per il report"""
+    if spec["enum"]:
+        return f"uno tra {'/'.join(spec['enum'])}"
+    return {"int": "intero", "float": "numero", "bool": "si/no"}.get(spec["dtype"], spec["dtype"])
+
+
+def coerce_sheet(df, sheet_name):
+    """
+    Tipizza un foglio secondo lo schema
+    Ritorna (DataFrame tipizzato, DataFrame errori FOGLIO/RIGA/COLONNA/VALORE/ATTESO)
+    RIGA è la riga Excel (intestazione = riga 1), anche se read_sheet ha
+    scartato righe vuote: l'indice è la posizione originale nel foglio.
+    """
+    schema = sheet_schema(sheet_name, df.columns)
+    excel_rows = df.index.to_numpy() + 2
+    typed_columns = {}
+    failures = []
+
+    for col, spec in schema.items():
+        typed, invalid, null = coerce_column(df[col], spec)
+        typed_columns[col] = typed
+
+        missing = null if not spec["nullable"] else np.zeros(len(df), dtype=bool)
+        for mask, expected in ((invalid, expected_label(spec)), (missing, "valore obbligatorio")):
+            positions = np.flatnonzero(mask)
+            if len(positions):
+                failures.append(pd.DataFrame({
+                    "FOGLIO": sheet_name,
+                    "RIGA": excel_rows[positions],
+                    "COLONNA": col,
+                    "VALORE": df[col].to_numpy()[positions],
+                    "ATTESO": expected,
+                }))
+
+    typed_df = pd.DataFrame(typed_columns, index=df.index)
+    return typed_df, concat_failures(failures)
+
+
+def concat_failures(failures):
+    failures = [frame for frame in failures if len(frame)]
+    if not failures:
+        return pd.DataFrame(columns=["FOGLIO", "RIGA", "COLONNA", "VALORE", "ATTESO"])
+    return pd.concat(failures, ignore_index=True)
+
+
+def coerce_frames(frames):
+    """Tipizza {nome_foglio: DataFrame}; ritorna (frame tipizzati, tutti gli errori)"""
+    typed_frames = {}
+    failures = []
+    for sheet_name, df in frames.items():
+        typed_frames[sheet_name], sheet_failures = coerce_sheet(df, sheet_name)
+        failures.append(sheet_failures)
+    return typed_frames, concat_failures(failures)
@@ -4,10 +4,18 @@ Script per convertire TravelCrew_Database.xlsx in CSV separati
 Simula il workflow GitHub Actions in locale
 """
 
+import argparse
+import json
 import pandas as pd
 import os
 from pathlib import Path
 
+from build_lookup_indexes import INDEXES_FILE, build_indexes, write_indexes
+from catalog_links import LINK_FORMATS, LIST_SEPARATOR, SCHEMA_FILE, SLOT_PLACEHOLDER, collapse_links
+from catalog_schema import coerce_frames
+from export_sqlite import write_sqlite
+from search_index import SEARCH_INDEX_FILE, write_search_index
+
 EXCEL_FILE = "TravelCrew_Database Edit 2.xlsx"
 OUTPUT_DIR = "public/data"
 
@@ -54,59 +62,148 @@ def fill_placeholders(df):
     return df
 
 
-# Verifica esistenza file Excel
-if not os.path.exists(EXCEL_FILE):
-    print(f"❌ ERRORE: File {EXCEL_FILE} non trovato!")
-    exit(1)
-
-# Crea directory output se non esiste
-Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
-
-print(f"📊 Conversione Excel → CSV")
-print(f"📁 Excel: {EXCEL_FILE}")
-print(f"📂 Output: {OUTPUT_DIR}")
-print(f"📋 Fogli: {len(SHEETS)}\n")
-
-converted = 0
-failed = []
-
-# Converti ogni foglio
-for sheet_name in SHEETS:
-    try:
-        print(f"🔄 {sheet_name}")
-
-        # Leggi foglio
-        df = pd.read_excel(
-            EXCEL_FILE,
-            sheet_name=sheet_name,
-            dtype=str,
-            na_filter=False
-        )
-
-        # Pulisci
-        df = df.dropna(how='all')
-        df = df.dropna(axis=1, how='all')
-        df = fill_placeholders(df)
-
-        # Salva CSV
-        csv_path = os.path.join(OUTPUT_DIR, f"{sheet_name}.csv")
-        df.to_csv(
-            csv_path,
-            index=False,
-            encoding='utf-8',
-            lineterminator='\n'
-        )
-
-        print(f"   ✅ {len(df)} righe × {len(df.columns)} colonne\n")
-        converted += 1
-
-    except Exception as e:
-        failed.append(sheet_name)
-        print(f"   ❌ Errore: {e}\n")
-
-print(f"{'='*60}")
-print(f"✅ Conversione completata!")
-print(f"   Successi: {converted}/{len(SHEETS)}")
-if failed:
-    print(f"   Falliti: {', '.join(failed)}")
-print(f"{'='*60}")
+def read_sheet(xl, sheet_name):
+    """Legge un foglio come stringhe e lo pulisce (celle vuote ancora vuote)"""
+    df = pd.read_excel(
+        xl,
+        sheet_name=sheet_name,
+        dtype=str,
+        na_filter=False
+    )
+
+    # Pulisci: con na_filter=False le celle vuote sono '', dropna non le vede
+    df = df[df.ne('').any(axis=1)]
+    df = df.dropna(axis=1, how='all')
+    return df
+
+
+def write_csv(df, sheet_name, output_dir, link_format="wide"):
+    """
+    Salva il foglio come CSV UTF-8
+    Con link_format compatto ritorna il descrittore delle famiglie di link
+    (e in formato adjacency scrive <foglio>.links.json accanto al CSV).
+    """
+    df, descriptor, adjacency = collapse_links(df, link_format, sheet_name)
+
+    csv_path = os.path.join(output_dir, f"{sheet_name}.csv")
+    df.to_csv(
+        csv_path,
+        index=False,
+        encoding='utf-8',
+        lineterminator='\n'
+    )
+
+    if adjacency:
+        links_path = os.path.join(output_dir, f"{sheet_name}.links.json")
+        with open(links_path, 'w', encoding='utf-8') as f:
+            json.dump(adjacency, f, ensure_ascii=False, separators=(',', ':'))
+
+    return descriptor
+
+
+def write_links_schema(descriptors, output_dir, link_format):
+    """Scrive links_schema.json per ricostruire le colonne larghe"""
+    schema = {
+        "format": link_format,
+        "separator": LIST_SEPARATOR,
+        "placeholder": SLOT_PLACEHOLDER,
+        "sheets": descriptors
+    }
+    with open(os.path.join(output_dir, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte il database Excel in CSV")
+    parser.add_argument("--excel", default=EXCEL_FILE, help="Workbook da convertire")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="Directory dei CSV")
+    parser.add_argument("--sqlite", metavar="DB_PATH",
+                        help="Scrive anche un database SQLite indicizzato")
+    parser.add_argument("--link-format", choices=LINK_FORMATS, default="wide",
+                        help="Formato delle famiglie EXTRA_n/COSTI_ACC_n/VOLO_n/HOTEL_n/ZONA_n nei CSV")
+    parser.add_argument("--indexes", action="store_true",
+                        help=f"Scrive gli indici di lookup precalcolati ({INDEXES_FILE})")
+    parser.add_argument("--search-index", action="store_true",
+                        help=f"Scrive l'indice full-text dei testi copy ({SEARCH_INDEX_FILE})")
+    parser.add_argument("--schema-report", metavar="CSV_PATH",
+                        help="Scrive le celle che non rispettano lo schema (tipo, enum, obbligatorie)")
+    args = parser.parse_args()
+
+    # Verifica esistenza file Excel
+    if not os.path.exists(args.excel):
+        print(f"❌ ERRORE: File {args.excel} non trovato!")
+        exit(1)
+
+    # Crea directory output se non esiste
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    print(f"📊 Conversione Excel → CSV")
+    print(f"📁 Excel: {args.excel}")
+    print(f"📂 Output: {args.output}")
+    print(f"📋 Fogli: {len(SHEETS)}\n")
+
+    converted = 0
+    failed = []
+    raw_frames = {}
+    descriptors = {}
+
+    xl = pd.ExcelFile(args.excel)
+
+    # Converti ogni foglio
+    for sheet_name in SHEETS:
+        try:
+            print(f"🔄 {sheet_name}")
+
+            raw = read_sheet(xl, sheet_name)
+            df = fill_placeholders(raw.copy())
+            descriptor = write_csv(df, sheet_name, args.output, args.link_format)
+            raw_frames[sheet_name] = raw
+            if descriptor:
+                descriptors[sheet_name] = descriptor
+
+            print(f"   ✅ {len(df)} righe × {len(df.columns)} colonne\n")
+            converted += 1
+
+        except Exception as e:
+            failed.append(sheet_name)
+            print(f"   ❌ Errore: {e}\n")
+
+    # Tipizza una volta sola i fogli letti: gli step successivi ricevono colonne tipizzate
+    frames, failures = coerce_frames(raw_frames)
+    if len(failures):
+        print(f"⚠️  Schema: {len(failures)} celle non valide")
+        for row in failures.head(10).itertuples(index=False):
+            print(f"   {row.FOGLIO}!{row.COLONNA} riga {row.RIGA}: '{row.VALORE}' (atteso {row.ATTESO})")
+        print()
+    else:
+        print(f"✅ Schema: tutte le celle valide\n")
+    if args.schema_report:
+        failures.to_csv(args.schema_report, index=False, encoding='utf-8', lineterminator='\n')
+
+    if args.link_format != "wide":
+        write_links_schema(descriptors, args.output, args.link_format)
+        print(f"🔗 Link in formato {args.link_format} → {SCHEMA_FILE}\n")
+
+    if args.indexes:
+        write_indexes(build_indexes(frames), args.output)
+        print(f"📇 Indici di lookup → {INDEXES_FILE}\n")
+
+    if args.search_index:
+        write_search_index(frames, args.output)
+        print(f"🔎 Indice full-text → {SEARCH_INDEX_FILE}\n")
+
+    if args.sqlite:
+        print(f"🗄️  SQLite → {args.sqlite}")
+        write_sqlite(frames, args.sqlite)
+        print()
+
+    print(f"{'='*60}")
+    print(f"✅ Conversione completata!")
+    print(f"   Successi: {converted}/{len(SHEETS)}")
+    if failed:
+        print(f"   Falliti: {', '.join(failed)}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Esporta i fogli convertiti in un unico database SQLite per query ad-hoc
+- una tabella per foglio, con tipi INTEGER/REAL/TEXT presi dallo schema (catalog_schema)
+- indici su CODICE, ZONA, DESTINAZIONE e sulle colonne di collegamento
+- tabelle di link normalizzate per le famiglie EXTRA_n, COSTI_ACC_n,
+  VOLO_n, HOTEL_n, ZONA_n: <foglio>_<famiglia>(CODICE, POSIZIONE, CODICE_COLLEGATO)
+
+Esempio: zone che puntano a un hotel inesistente
+    SELECT l.CODICE, l.CODICE_COLLEGATO
+    FROM zone_tech_hotel l
+    LEFT JOIN hotel_tech h ON h.CODICE = l.CODICE_COLLEGATO
+    WHERE h.CODICE IS NULL;
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from catalog_links import find_link_families, melt_links
+
+# Colonne indicizzate in ogni tabella che le contiene
+INDEXED_COLUMNS = [
+    "CODICE", "ZONA", "DESTINAZIONE",
+    "CODICE_COLLEGATO", "ZONA_COLLEGATA", "DESTINAZIONE_COLLEGATA", "DEST_ABBINATA_1"
+]
+
+
+def column_sql_type(series):
+    """Tipo SQLite dal dtype della colonna tipizzata da catalog_schema"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    return "TEXT"
+
+
+def sql_frame(df):
+    """Colonne pronte per to_sql: categorie e stringhe come object, NA → NULL"""
+    types = {col: column_sql_type(df[col]) for col in df.columns}
+    df = df.astype({col: object for col, sql_type in types.items() if sql_type == "TEXT"})
+    return df, types
+
+
+def create_indexes(conn, table, columns):
+    """Crea un indice per ogni colonna indicizzabile presente nella tabella"""
+    for col in columns:
+        conn.execute(f'CREATE INDEX "idx_{table}_{col}" ON "{table}" ("{col}")')
+
+
+def write_sqlite(frames, db_path):
+    """
+    Scrive {nome_foglio: DataFrame tipizzato} in un database SQLite
+    Il file viene ricostruito da zero e sostituito atomicamente.
+    """
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for sheet_name, df in frames.items():
+            typed, types = sql_frame(df)
+            typed.to_sql(sheet_name, conn, index=False, dtype=types)
+            create_indexes(conn, sheet_name, [c for c in INDEXED_COLUMNS if c in typed.columns])
+            print(f"   🗄️  {sheet_name}: {len(typed)} righe")
+
+            if "CODICE" not in df.columns:
+                continue
+
+            for family, columns in find_link_families(df.columns).items():
+                table = f"{sheet_name}_{family.lower()}"
+                links = melt_links(df, columns)
+                links.to_sql(table, conn, index=False, dtype={
+                    "CODICE": "TEXT", "POSIZIONE": "INTEGER", "CODICE_COLLEGATO": "TEXT"
+                })
+                create_indexes(conn, table, ["CODICE", "CODICE_COLLEGATO"])
+                print(f"      ↳ {table}: {len(links)} link")
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Merge a tre vie di due copie modificate del database Excel
+Confronta base / ours / theirs cella per cella in modo vettoriale (niente loop
+Python sulle celle), applica le modifiche non in conflitto e scrive un report
+dei conflitti. Usa COLUMN_MAPPING per l'ordine delle colonne e CODICE come
+chiave di riga. Un foglio rimosso da una parte e modificato dall'altra viene
+mantenuto (versione modificata) e segnalato come conflitto.
+
+Uso:
+    python merge_excel_versions.py BASE.xlsx OURS.xlsx THEIRS.xlsx \
+        -o TravelCrew_Database.xlsx --report merge_conflicts.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from generate_excel_from_csv import COLUMN_MAPPING
+
+OUTPUT_FILE = "TravelCrew_Database Merged.xlsx"
+REPORT_FILE = "merge_conflicts.csv"
+
+KEY_COLUMN = "CODICE"
+
+# Marcatore per celle di righe/colonne/fogli assenti in una delle versioni
+ABSENT = "\x00ASSENTE"
+ABSENT_LABEL = "<assente>"
+
+
+def schema_columns(sheet_name):
+    """Colonne attese per un foglio secondo COLUMN_MAPPING (None se non mappato)"""
+    entity, _, kind = sheet_name.rpartition('_')
+    return COLUMN_MAPPING.get(entity, {}).get(kind)
+
+
+def load_workbook(path):
+    """
+    Legge tutti i fogli con i valori di cella originali (int, float, testo...)
+    Celle vuote come '', senza conversione di NaN.
+    """
+    return pd.read_excel(path, sheet_name=None, dtype=object, na_filter=False)
+
+
+def as_text(grid):
+    """Stessa griglia come stringhe (come dtype=str di read_excel) per i confronti"""
+    return pd.DataFrame(grid).astype(str).to_numpy(dtype=object)
+
+
+def keyed(df):
+    """
+    Indicizza le righe per (CODICE, occorrenza)
+    L'occorrenza rende univoca la chiave anche con codici duplicati;
+    senza colonna CODICE si usa la posizione della riga.
+    """
+    df = df.astype(object)
+    if KEY_COLUMN in df.columns:
+        codes = df[KEY_COLUMN].astype(str)
+    else:
+        codes = pd.Series(np.arange(len(df)).astype(str), index=df.index)
+    occurrence = codes.groupby(codes, sort=False).cumcount()
+    df.index = pd.MultiIndex.from_arrays([codes.to_numpy(), occurrence.to_numpy()],
+                                         names=[KEY_COLUMN, "OCCORRENZA"])
+    return df
+
+
+def ordered_union(indexes):
+    """Unione di più Index mantenendo l'ordine di prima apparizione"""
+    return indexes[0].append(list(indexes[1:])).unique()
+
+
+def merged_columns(sheet_name, frames):
+    """Colonne del foglio unito: prima quelle dello schema, poi le extra"""
+    union = ordered_union([df.columns for df in frames])
+    schema = schema_columns(sheet_name)
+    if schema is None:
+        return union
+    in_schema = [col for col in schema if col in union]
+    extra = [col for col in union if col not in schema]
+    return pd.Index(in_schema + extra)
+
+
+def three_way(base, ours, theirs):
+    """
+    Merge vettoriale di tre array allineati (valori, maschere di presenza...)
+    Ritorna (merged, cambi ours, cambi theirs, conflitti)
+    """
+    changed_ours = ours != base
+    changed_theirs = theirs != base
+    conflict = changed_ours & changed_theirs & (ours != theirs)
+    merged = np.where(changed_ours, ours, theirs)
+    merged = np.where(conflict, base, merged)
+    return merged, changed_ours, changed_theirs, conflict
+
+
+def merge_sheet(sheet_name, base_df, ours_df, theirs_df):
+    """
+    Merge a tre vie di un singolo foglio
+    Il confronto avviene sul testo delle celle; nel foglio unito finisce il
+    valore originale (numero, testo, data) della versione che ha vinto.
+    Ritorna (DataFrame unito, DataFrame conflitti, statistiche)
+    """
+    frames = [keyed(df) for df in (base_df, ours_df, theirs_df)]
+    rows = ordered_union([df.index for df in frames])
+    cols = merged_columns(sheet_name, frames)
+
+    # Allinea le tre versioni sulla stessa griglia righe × colonne
+    typed = [
+        df.reindex(index=rows, columns=cols, fill_value=ABSENT).to_numpy(dtype=object)
+        for df in frames
+    ]
+    base, ours, theirs = (as_text(grid) for grid in typed)
+    merged, changed_ours, changed_theirs, conflict = three_way(base, ours, theirs)
+    typed_base, typed_ours, typed_theirs = typed
+    merged_typed = np.where(conflict, typed_base, np.where(changed_ours, typed_ours, typed_theirs))
+
+    # Presenza di righe e colonne: stessa regola a tre vie
+    row_presence = [rows.isin(df.index) for df in frames]
+    col_presence = [cols.isin(df.columns) for df in frames]
+    keep_rows = three_way(*row_presence)[0] | conflict.any(axis=1)
+    keep_cols = three_way(*col_presence)[0] | conflict.any(axis=0)
+
+    # Celle assenti in righe/colonne mantenute (es. delete/modify): torna alla base
+    absent = merged == ABSENT
+    merged = np.where(absent, base, merged)
+    merged_typed = np.where(absent, typed_base, merged_typed)
+    still_absent = merged == ABSENT
+    merged = np.where(still_absent, '', merged)
+    merged_typed = np.where(still_absent, '', merged_typed)
+
+    merged_df = pd.DataFrame(merged_typed[keep_rows][:, keep_cols], columns=cols[keep_cols])
+
+    # Risultato sull'intera griglia (righe/colonne rimosse = assenti) per contare
+    # le modifiche applicate con lo stesso metro di ours/theirs
+    final = np.where(np.outer(keep_rows, keep_cols), merged, ABSENT)
+
+    row_idx, col_idx = np.nonzero(conflict)
+    conflicts = pd.DataFrame({
+        "FOGLIO": sheet_name,
+        KEY_COLUMN: rows.get_level_values(0)[row_idx],
+        "COLONNA": cols[col_idx],
+        "BASE": base[row_idx, col_idx],
+        "OURS": ours[row_idx, col_idx],
+        "THEIRS": theirs[row_idx, col_idx],
+    }).replace(ABSENT, ABSENT_LABEL)
+
+    stats = {
+        "ours": int(changed_ours.sum()),
+        "theirs": int(changed_theirs.sum()),
+        "applied": int((final != base).sum()),
+        "rows_removed": int((row_presence[0] & ~keep_rows).sum()),
+        "cols_removed": int((col_presence[0] & ~keep_cols).sum()),
+        "conflicts": len(conflicts),
+    }
+    return merged_df, conflicts, stats
+
+
+def sheet_changed(base_df, df):
+    """True se il foglio differisce dalla base (valori come testo, righe, colonne)"""
+    return (
+        list(base_df.columns) != list(df.columns)
+        or not np.array_equal(as_text(base_df.to_numpy(dtype=object)), as_text(df.to_numpy(dtype=object)))
+    )
+
+
+def sheet_conflict(sheet_name, present):
+    """Riga di report per un foglio rimosso da una parte e modificato dall'altra"""
+    ours, theirs = (
+        "<foglio modificato>" if is_present else ABSENT_LABEL for is_present in present[1:]
+    )
+    return pd.DataFrame([{
+        "FOGLIO": sheet_name, KEY_COLUMN: "", "COLONNA": "",
+        "BASE": "<foglio>", "OURS": ours, "THEIRS": theirs,
+    }])
+
+
+def merge_workbooks(base_file, ours_file, theirs_file):
+    """
+    Merge a tre vie di tre workbook
+    Ritorna ({foglio: DataFrame}, DataFrame conflitti, {foglio: statistiche})
+    """
+    books = [load_workbook(path) for path in (base_file, ours_file, theirs_file)]
+    sheet_names = list(dict.fromkeys(name for book in books for name in book))
+    empty = pd.DataFrame()
+
+    merged_sheets = {}
+    all_conflicts = []
+    all_stats = {}
+
+    for sheet_name in sheet_names:
+        present = np.array([sheet_name in book for book in books])
+        frames = [book.get(sheet_name, empty) for book in books]
+        removed_conflict = False
+        if not three_way(*present)[0]:
+            # Rimosso da una parte: se l'altra l'ha modificato si tiene la sua versione
+            kept = frames[1] if present[1] else frames[2]
+            if not (present[0] and present[1] != present[2] and sheet_changed(frames[0], kept)):
+                print(f"🗑️  {sheet_name}: foglio rimosso")
+                continue
+            print(f"⚠️  {sheet_name}: rimosso da una parte ma modificato dall'altra, mantenuto")
+            removed_side = "ours" if not present[1] else "theirs"
+            frames = [frames[0], kept, kept]
+            removed_conflict = True
+
+        merged_df, conflicts, stats = merge_sheet(sheet_name, *frames)
+        if removed_conflict:
+            conflicts = pd.concat([sheet_conflict(sheet_name, present), conflicts], ignore_index=True)
+            stats["conflicts"] = len(conflicts)
+            # La parte che ha rimosso il foglio ha "modificato" tutte le celle della base
+            stats[removed_side] = int(frames[0].size)
+
+        schema = schema_columns(sheet_name)
+        if schema is not None:
+            extra = [col for col in merged_df.columns if col not in schema]
+            if extra:
+                print(f"⚠️  {sheet_name}: colonne fuori schema {extra}")
+
+        merged_sheets[sheet_name] = merged_df
+        all_conflicts.append(conflicts)
+        all_stats[sheet_name] = stats
+
+    report = pd.concat(all_conflicts, ignore_index=True) if all_conflicts else pd.DataFrame()
+    return merged_sheets, report, all_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a tre vie di due copie del database Excel")
+    parser.add_argument("base", help="Workbook di partenza comune")
+    parser.add_argument("ours", help="Prima copia modificata")
+    parser.add_argument("theirs", help="Seconda copia modificata")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help="Workbook unito da scrivere")
+    parser.add_argument("--report", default=REPORT_FILE, help="CSV con i conflitti")
+    args = parser.parse_args()
+
+    print(f"🔀 Merge a tre vie")
+    print(f"   Base:   {args.base}")
+    print(f"   Ours:   {args.ours}")
+    print(f"   Theirs: {args.theirs}\n")
+
+    merged_sheets, report, stats = merge_workbooks(args.base, args.ours, args.theirs)
+
+    for sheet_name, sheet_stats in stats.items():
+        icon = "❌" if sheet_stats["conflicts"] else "✅"
+        print(f"{icon} {sheet_name}: "
+              f"{sheet_stats['ours']} modifiche ours, "
+              f"{sheet_stats['theirs']} modifiche theirs, "
+              f"{sheet_stats['applied']} applicate, "
+              f"{sheet_stats['conflicts']} conflitti")
+        if sheet_stats["rows_removed"] or sheet_stats["cols_removed"]:
+            print(f"   🗑️  rimosse {sheet_stats['rows_removed']} righe e "
+                  f"{sheet_stats['cols_removed']} colonne (incluse nelle applicate)")
+
+    with pd.ExcelWriter(args.output, engine='openpyxl') as writer:
+        for sheet_name, df in merged_sheets.items():
+            # Celle vuote davvero vuote, non stringhe ''
+            df.mask(df.eq('')).to_excel(writer, sheet_name=sheet_name, index=False)
+
+    report.to_csv(args.report, index=False, encoding='utf-8', lineterminator='\n')
+
+    print(f"\n{'='*60}")
+    print(f"📁 Workbook unito: {args.output}")
+    print(f"📋 Report conflitti: {args.report} ({len(report)} celle)")
+    print(f"{'='*60}")
+
+    if len(report):
+        print("⚠️  Conflitti presenti: le celle in conflitto mantengono il valore base")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
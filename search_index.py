@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Indice full-text sui testi copy di esperienze, zone e hotel
+- tokenizzazione italiana insensibile ad accenti e maiuscole
+  ("Città" → "citta", "dell'isola" → "isola")
+- indice invertito compatto: termini ordinati + posting list delta-encoded
+- ricerca per prefisso su ogni parola della query (AND tra le parole); l'ultima
+  parola, se non è una stopword o è l'unica, resta un prefisso anche se corta,
+  così "ma" o "ci" trovano "mare", "città"
+
+Uso:
+    python search_index.py --data public/data           # costruisce search_index.json
+    python search_index.py --data public/data "templ buddh"
+
+    from search_index import SearchIndex
+    SearchIndex.load("public/data/search_index.json").search("spiagg")
+"""
+
+import argparse
+import bisect
+import json
+import os
+import re
+import unicodedata
+
+from catalog_links import EMPTY_VALUES, read_data_csv
+from catalog_schema import coerce_frames
+
+SEARCH_INDEX_FILE = "search_index.json"
+
+# Campi indicizzati per foglio
+SEARCH_FIELDS = {
+    "esperienze_copy": ["ESPERIENZE", "DESCRIZIONE"],
+    "zone_copy": ["ZONA", "DESCRIZIONE", "CARATTERISTICHE"],
+    "hotel_copy": ["QUARTIERE", "SERVIZI_MINIMI"],
+}
+
+# Articoli, preposizioni (anche elise), congiunzioni e ausiliari più comuni
+STOPWORDS = frozenset("""
+il lo la i gli le l un uno una un d di a da in con su per tra fra
+del dello della dei degli delle dell al allo alla ai agli alle all
+dal dallo dalla dai dagli dalle dall nel nello nella nei negli nelle nell
+sul sullo sulla sui sugli sulle sull col coi e ed o od ma se che chi non
+ne ci vi si mi ti come piu anche tutto tutti tutte ogni sono era
+essere ha hanno ho avere questo questa questi queste quello quella
+""".split())
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Minuscolo e senza accenti/diacritici"""
+    decomposed = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Token normalizzati, senza stopword né token di una sola lettera"""
+    return [
+        token for token in TOKEN.findall(normalize(text))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def query_tokens(query):
+    """
+    Token della query filtrati come il testo indicizzato, tranne l'ultimo se
+    è l'unico ("ci" → "città") o non è una stopword ("m" → "mare"): in quei
+    casi è un prefisso ancora incompleto. "isola del" cerca solo "isola".
+    """
+    tokens = TOKEN.findall(normalize(query))
+    if not tokens:
+        return []
+    *complete, last = tokens
+    if len(tokens) == 1 or last not in STOPWORDS:
+        return tokenize(" ".join(complete)) + [last]
+    return tokenize(" ".join(complete))
+
+
+class SearchIndex:
+    """Indice invertito: docs[i] = [foglio, CODICE], postings[t] = doc id crescenti"""
+
+    def __init__(self, docs, terms, postings):
+        self.docs = docs
+        self.terms = terms
+        self.postings = postings
+
+    @classmethod
+    def build(cls, frames):
+        """Costruisce l'indice da {nome_foglio: DataFrame} (fogli mancanti saltati)"""
+        docs = []
+        inverted = {}
+        for sheet_name, fields in SEARCH_FIELDS.items():
+            df = frames.get(sheet_name)
+            if df is None:
+                continue
+            # Righe senza CODICE (NA nei fogli tipizzati) non sono documenti
+            df = df[df["CODICE"].notna()]
+            fields = [field for field in fields if field in df.columns]
+            text = df[fields].astype("string").fillna("")
+            text = text.mask(text.isin(EMPTY_VALUES), "").agg(" ".join, axis=1)
+            for codice, content in zip(df["CODICE"], text):
+                doc_id = len(docs)
+                docs.append([sheet_name, codice])
+                for token in set(tokenize(content)):
+                    inverted.setdefault(token, []).append(doc_id)
+
+        terms = sorted(inverted)
+        return cls(docs, terms, [inverted[term] for term in terms])
+
+    def save(self, path):
+        """Scrive l'indice con posting list delta-encoded"""
+        deltas = [
+            [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+            for ids in self.postings
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": 1,
+                "fields": SEARCH_FIELDS,
+                "docs": self.docs,
+                "terms": self.terms,
+                "postings": deltas,
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        postings = []
+        for deltas in data["postings"]:
+            ids, total = [], 0
+            for delta in deltas:
+                total += delta
+                ids.append(total)
+            postings.append(ids)
+        return cls(data["docs"], data["terms"], postings)
+
+    def prefix_matches(self, prefix):
+        """Doc id dei termini che iniziano con prefix (ricerca binaria sui termini)"""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\uffff")
+        matched = set()
+        for postings in self.postings[start:end]:
+            matched.update(postings)
+        return matched
+
+    def search(self, query, sheet=None, limit=None):
+        """
+        [(foglio, CODICE), ...] dei documenti che contengono tutte le parole
+        (ognuna come prefisso), nell'ordine del catalogo
+        """
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        matched = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            ids = self.prefix_matches(token)
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return []
+        results = [tuple(self.docs[i]) for i in sorted(matched)]
+        if sheet is not None:
+            results = [result for result in results if result[0] == sheet]
+        return results[:limit] if limit else results
+
+
+def write_search_index(frames, output_dir):
+    """Costruisce e salva search_index.json accanto ai CSV"""
+    index = SearchIndex.build(frames)
+    path = os.path.join(output_dir, SEARCH_INDEX_FILE)
+    index.save(path)
+    return index, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indice full-text dei testi copy")
+    parser.add_argument("--data", default="public/data", help="Directory dei CSV")
+    parser.add_argument("query", nargs="?", help="Cerca nell'indice esistente invece di ricostruirlo")
+    args = parser.parse_args()
+
+    path = os.path.join(args.data, SEARCH_INDEX_FILE)
+
+    if args.query:
+        for sheet_name, codice in SearchIndex.load(path).search(args.query):
+            print(f"   {sheet_name}: {codice}")
+        return
+
+    frames = {}
+    for sheet_name in SEARCH_FIELDS:
+        csv_path = os.path.join(args.data, f"{sheet_name}.csv")
+        if os.path.exists(csv_path):
+            frames[sheet_name] = read_data_csv(args.data, sheet_name)
+        else:
+            print(f"⚠️  {csv_path} non trovato, skip")
+
+    # Placeholder dei CSV (TBD in CODICE) → NA, come nella conversione diretta
+    frames, _ = coerce_frames(frames)
+    index, path = write_search_index(frames, args.data)
+    print(f"🔎 Indice full-text → {path}")
+    print(f"   ✅ {len(index.docs)} documenti, {len(index.terms)} termini")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Server HTTP locale per i dati convertiti (stand-in del CDN)
+- ETag forti dall'hash SHA-256 del contenuto servito, 304 su If-None-Match
+- richieste Range (singolo intervallo) con 206 / 416 e supporto If-Range
+- negoziazione dei file precompressi <file>.br / <file>.gz via Accept-Encoding
+- Cache-Control: no-cache → il browser rivalida sempre, così cold e warm load
+  sono misurabili in modo ripetibile
+
+Uso:
+    python serve_data.py --root public/data --port 8765 --precompress
+
+Anteprima del frontend con questi dati (proxy Vite su /trave-crew-v.2/data/,
+senza il cache buster ?v=... di dataLoader, così le richieste sono rivalidate via ETag):
+    VITE_DATA_SERVER=http://127.0.0.1:8765 npm run dev
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import time
+from email.utils import formatdate
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:  # brotli opzionale: solo .gz
+    brotli = None
+
+DATA_DIR = "public/data"
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Ordine di preferenza delle codifiche precompresse
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Content-Type per richieste dirette ai file compressi (es. /zone_tech.csv.gz)
+COMPRESSED_TYPES = {"gzip": "application/gzip", "br": "application/x-brotli"}
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+REASONS = {
+    200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable",
+}
+
+mimetypes.add_type("text/csv", ".csv")
+
+
+def precompress(root):
+    """Scrive <file>.gz (e <file>.br se brotli è installato) per i file più nuovi"""
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            variants = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for suffix, compress in variants:
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compress(data))
+                written += 1
+    return written
+
+
+def parse_accept_encoding(header):
+    """{codifica: q} dall'header Accept-Encoding"""
+    accepted = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            q = float(match.group(1))
+        accepted[token.strip().lower()] = q
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusivi per un singolo intervallo bytes=...
+    None se l'header va ignorato (multi-range, sintassi non valida),
+    "unsatisfiable" se l'intervallo è fuori dal file.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return "unsatisfiable"
+    return start, end
+
+
+def etag_matches(header, etag):
+    """Confronto debole per If-None-Match (lista di tag o *)"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in tags
+
+
+class Representation:
+    """Contenuto di un file (o della sua versione precompressa) con ETag forte"""
+
+    def __init__(self, path, stat):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        self.key = (stat.st_mtime_ns, stat.st_size)
+        self.etag = f'"{hashlib.sha256(self.data).hexdigest()[:32]}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+
+class DataServer:
+    """Serve i file di root rileggendoli (e ricalcolando l'ETag) solo se cambiano"""
+
+    def __init__(self, root, max_age=0):
+        self.root = os.path.realpath(root)
+        self.max_age = max_age
+        self.cache = {}
+
+    def representation(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.cache.pop(path, None)
+            return None
+        cached = self.cache.get(path)
+        if cached is None or cached.key != (stat.st_mtime_ns, stat.st_size):
+            cached = self.cache[path] = Representation(path, stat)
+        return cached
+
+    def resolve(self, target):
+        """Percorso su disco per l'URL richiesto (None se fuori da root)"""
+        relative = unquote(urlsplit(target).path).lstrip("/")
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        return path if os.path.isfile(path) else None
+
+    def negotiate(self, path, accept_encoding):
+        """Sceglie la rappresentazione migliore tra originale e precompresse"""
+        original = self.representation(path)
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding, suffix in ENCODINGS:
+            if accepted.get(encoding, 0) > 0:
+                rep = self.representation(path + suffix)
+                # Una versione compressa più vecchia del file (es. dopo watch mode) è scaduta
+                if rep is not None and rep.key[0] >= original.key[0]:
+                    return rep, encoding
+        return original, None
+
+    def respond(self, method, target, headers):
+        """(status, headers, body) per una richiesta già parsata"""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+
+        path = self.resolve(target)
+        if path is None:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not Found"
+
+        rep, encoding = self.negotiate(path, headers.get("accept-encoding", ""))
+        content_type, file_encoding = mimetypes.guess_type(path)
+        if file_encoding:
+            # File compresso chiesto per nome: sono byte compressi, non il CSV
+            content_type = COMPRESSED_TYPES.get(file_encoding, "application/octet-stream")
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        response_headers = {
+            "ETag": rep.etag,
+            "Last-Modified": rep.last_modified,
+            "Cache-Control": f"max-age={self.max_age}" if self.max_age else "no-cache",
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+            "Content-Type": content_type,
+        }
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, rep.etag):
+            return 304, response_headers, b""
+
+        size = len(rep.data)
+        range_header = headers.get("range")
+        if_range = headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == rep.etag):
+            byte_range = parse_range(range_header, size)
+            if byte_range == "unsatisfiable":
+                response_headers["Content-Range"] = f"bytes */{size}"
+                return 416, response_headers, b""
+            if byte_range is not None:
+                start, end = byte_range
+                response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+                return 206, response_headers, rep.data[start:end + 1]
+
+        return 200, response_headers, rep.data
+
+    async def handle(self, reader, writer):
+        """Connessione HTTP/1.1 con keep-alive"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                start = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.send(writer, "HEAD", 400, {}, b"", keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+                status, response_headers, body = self.respond(method, target, headers)
+                await self.send(writer, method, status, response_headers, body, keep_alive)
+
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"{method} {target} → {status} {len(body)}B {elapsed:.1f}ms")
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def send(self, writer, method, status, headers, body, keep_alive):
+        headers = dict(headers)
+        headers["Date"] = formatdate(usegmt=True)
+        headers["Content-Length"] = str(len(body)) if status != 304 else None
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items() if value is not None
+        ) + "\r\n"
+        writer.write(head.encode("latin-1"))
+        if method != "HEAD" and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+
+async def serve(root, host, port, max_age):
+    server = DataServer(root, max_age)
+    async with await asyncio.start_server(server.handle, host, port) as srv:
+        print(f"🌐 Dati serviti da {server.root} su http://{host}:{port}/")
+        print(f"   Ctrl+C per uscire\n")
+        await srv.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server locale per i dati con ETag/Range")
+    parser.add_argument("--root", default=DATA_DIR, help="Directory da servire")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-age", type=int, default=0,
+                        help="Cache-Control max-age in secondi (0 = no-cache, sempre rivalidato)")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Genera prima <file>.gz / <file>.br accanto ai dati")
+    args = parser.parse_args()
+
+    if args.precompress:
+        written = precompress(args.root)
+        print(f"🗜️  {written} file precompressi aggiornati")
+
+    try:
+        asyncio.run(serve(args.root, args.host, args.port, args.max_age))
+    except KeyboardInterrupt:
+        print(f"\n👋 Server terminato")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,8 @@ export const loadCSV = (filePath) => {
   const fullPath = cleanPath.includes('/') ? filePath : getDataPath(cleanPath);
 
   // Add cache buster to force fresh load
-  const cacheBuster = `?v=${Date.now()}`;
+  // (not with serve_data.py: it revalidates via ETag, so warm loads stay measurable)
+  const cacheBuster = import.meta.env.VITE_DATA_SERVER ? '' : `?v=${Date.now()}`;
   const urlWithCacheBuster = fullPath + cacheBuster;
 
   console.log('🔄 Loading CSV from:', urlWithCacheBuster);
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Verifica la pipeline di conversione su un workbook con righe sporche
+Copia il workbook, inserisce in ogni foglio una riga completamente vuota e una
+riga senza CODICE (e senza BUDGET), poi lancia convert_excel_to_csv con tutti i
+flag di output e un giro di watch mode. Tutti gli artefatti devono essere
+scritti, i JSON non devono contenere CODICE nulli o placeholder e gli script
+standalone (che rileggono i CSV) devono produrre gli stessi JSON.
+
+Uso:
+    python verify_pipeline.py --excel "TravelCrew_Database Edit 2.xlsx"
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+import openpyxl
+import pandas as pd
+
+from build_lookup_indexes import INDEXES_FILE
+from catalog_links import EMPTY_VALUES
+from catalog_schema import BUDGET_LEVELS
+from convert_excel_to_csv import EXCEL_FILE, SHEETS
+from search_index import SEARCH_INDEX_FILE
+from watch_excel import CatalogState
+
+# Riga (Excel) in cui inserire la riga vuota, a metà dei dati
+BLANK_ROW = 3
+
+# Valori che non devono mai comparire come CODICE negli artefatti
+PLACEHOLDERS = set(EMPTY_VALUES)
+
+
+def dirty_workbook(source, target):
+    """
+    Salva una copia di source con, per ogni foglio convertito, una riga vuota
+    in BLANK_ROW e in fondo la copia di una riga con CODICE e BUDGET vuoti
+    """
+    wb = openpyxl.load_workbook(source)
+    for sheet_name in SHEETS:
+        if sheet_name not in wb.sheetnames:
+            continue
+        ws = wb[sheet_name]
+        ws.insert_rows(BLANK_ROW)
+        header = [cell.value for cell in ws[1]]
+        row = [cell.value for cell in ws[BLANK_ROW + 1]]
+        for col in ("CODICE", "BUDGET"):
+            if col in header:
+                row[header.index(col)] = None
+        ws.append(row)
+    wb.save(target)
+
+
+def json_codes(value):
+    """Tutte le liste di CODICE annidate in un indice di lookup"""
+    if isinstance(value, dict):
+        for nested in value.values():
+            yield from json_codes(nested)
+    else:
+        yield from value
+
+
+def check(condition, message, errors):
+    print(f"   {'✅' if condition else '❌'} {message}")
+    if not condition:
+        errors.append(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica la pipeline su righe vuote e senza CODICE")
+    parser.add_argument("--excel", default=EXCEL_FILE, help="Workbook di partenza")
+    args = parser.parse_args()
+
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        excel = os.path.join(tmp, "dirty.xlsx")
+        output = os.path.join(tmp, "data")
+        report = os.path.join(tmp, "schema.csv")
+        dirty_workbook(args.excel, excel)
+
+        print(f"🔄 Conversione con tutti i flag")
+        result = subprocess.run([
+            sys.executable, "convert_excel_to_csv.py", "--excel", excel, "--output", output,
+            "--sqlite", os.path.join(tmp, "catalog.db"), "--indexes", "--search-index",
+            "--link-format", "adjacency", "--schema-report", report,
+        ], capture_output=True, text=True)
+        check(result.returncode == 0, "convert_excel_to_csv termina senza errori", errors)
+        if result.returncode:
+            print(result.stderr)
+
+        for sheet_name in SHEETS:
+            path = os.path.join(output, f"{sheet_name}.csv")
+            if os.path.exists(path):
+                df = pd.read_csv(path, dtype=str, na_filter=False)
+                blank = ~df.ne("TBD").any(axis=1)
+                check(not blank.any(), f"{sheet_name}.csv senza righe vuote", errors)
+
+        if os.path.exists(os.path.join(output, SEARCH_INDEX_FILE)):
+            with open(os.path.join(output, SEARCH_INDEX_FILE), encoding='utf-8') as f:
+                docs = json.load(f)["docs"]
+            check(all(codice and codice not in PLACEHOLDERS for _, codice in docs),
+                  f"{SEARCH_INDEX_FILE} senza CODICE nulli o placeholder", errors)
+        else:
+            check(False, f"{SEARCH_INDEX_FILE} scritto", errors)
+
+        if os.path.exists(os.path.join(output, INDEXES_FILE)):
+            with open(os.path.join(output, INDEXES_FILE), encoding='utf-8') as f:
+                indexes = json.load(f)
+            check(all(codice and codice not in PLACEHOLDERS for codice in json_codes(indexes)),
+                  f"{INDEXES_FILE} senza CODICE nulli o placeholder", errors)
+            budgets = {budget for zone in indexes["hotel_per_zona_budget"].values() for budget in zone}
+            check(budgets <= set(BUDGET_LEVELS), f"{INDEXES_FILE} solo con BUDGET validi", errors)
+        else:
+            check(False, f"{INDEXES_FILE} scritto", errors)
+
+        print(f"\n🔄 Indici standalone dai CSV")
+        for script, artifact in (("build_lookup_indexes.py", INDEXES_FILE),
+                                 ("search_index.py", SEARCH_INDEX_FILE)):
+            path = os.path.join(output, artifact)
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                from_workbook = json.load(f)
+            result = subprocess.run([sys.executable, script, "--data", output],
+                                    capture_output=True, text=True)
+            check(result.returncode == 0, f"{script} termina senza errori", errors)
+            with open(path, encoding='utf-8') as f:
+                from_csv = json.load(f)
+            check(from_csv == from_workbook, f"{script} riproduce {artifact}", errors)
+
+        if os.path.exists(os.path.join(tmp, "catalog.db")):
+            conn = sqlite3.connect(os.path.join(tmp, "catalog.db"))
+            count = conn.execute("SELECT COUNT(*) FROM esperienze_tech").fetchone()[0]
+            conn.close()
+            check(count > 0, "SQLite scritto", errors)
+
+        if os.path.exists(report):
+            failures = pd.read_csv(report, dtype=str, na_filter=False)
+            blank_row = failures["RIGA"] == str(BLANK_ROW)
+            check(not blank_row.any(), "righe vuote assenti dal report schema", errors)
+
+        print(f"\n🔄 Watch mode")
+        try:
+            state = CatalogState(excel, os.path.join(tmp, "watch"), indexes=True)
+            os.makedirs(state.output_dir)
+            check(len(state.refresh()) > 0, "refresh completo senza errori", errors)
+        except Exception as e:
+            check(False, f"refresh completo senza errori ({type(e).__name__}: {e})", errors)
+
+    print(f"\n{'='*60}")
+    if errors:
+        print(f"❌ {len(errors)} verifiche fallite")
+        sys.exit(1)
+    print(f"✅ Pipeline robusta a righe vuote e senza CODICE")
+
+
+if __name__ == "__main__":
+    main()
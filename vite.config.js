@@ -1,12 +1,25 @@
-import { defineConfig } from 'vite'
+import { defineConfig, loadEnv } from 'vite'
 import react from '@vitejs/plugin-react'
 
+const base = '/trave-crew-v.2/'
+
 // https://vitejs.dev/config/
-export default defineConfig({
-  plugins: [react()],
-  base: '/trave-crew-v.2/',
-  server: {
-    port: 5173,
-    open: true
+export default defineConfig(({ mode }) => {
+  // VITE_DATA_SERVER=http://127.0.0.1:8765 → /data servito da serve_data.py (ETag/Range/.gz)
+  const dataServer = loadEnv(mode, process.cwd(), '').VITE_DATA_SERVER
+
+  return {
+    plugins: [react()],
+    base,
+    server: {
+      port: 5173,
+      open: true,
+      proxy: dataServer ? {
+        [`${base}data/`]: {
+          target: dataServer,
+          rewrite: (path) => path.slice(`${base}data`.length)
+        }
+      } : undefined
+    }
   }
-})
\ No newline at end of file
+})
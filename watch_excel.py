@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Watch mode: rigenera i CSV a ogni salvataggio del database Excel
+- eventi filesystem (watchdog se installato, altrimenti polling di mtime/size)
+- debounce: Excel salva con file temporanei + rename, si aspetta che si calmi
+- riconverte solo i fogli cambiati, confrontando un'impronta dei valori di cella
+  letta direttamente dallo zip dell'xlsx con un parser XML (senza openpyxl)
+- tiene in memoria i fogli già tipizzati (catalog_schema) e rivalida schema e
+  link solo dove serve
+
+Uso:
+    python watch_excel.py --excel TravelCrew_Database.xlsx --indexes
+"""
+
+import argparse
+import hashlib
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from xml.etree import ElementTree
+
+import pandas as pd
+
+from build_lookup_indexes import INDEXES_FILE, build_indexes, write_indexes
+from catalog_links import LINK_FORMATS, find_broken_links
+from catalog_schema import coerce_sheet, concat_failures
+from convert_excel_to_csv import (
+    EXCEL_FILE, OUTPUT_DIR, SHEETS, fill_placeholders, read_sheet, write_csv, write_links_schema
+)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog opzionale: fallback su polling
+    Observer = None
+    FileSystemEventHandler = object
+
+DEBOUNCE_SECONDS = 0.3
+POLL_SECONDS = 0.5
+
+
+def local_name(tag):
+    """Nome del tag senza namespace (<x:c> e <c> → c, qualunque sia il prefisso)"""
+    return tag.rpartition("}")[2]
+
+
+def attribute(elem, name):
+    """Valore di un attributo cercato per nome locale (r:id, Id, ...)"""
+    for key, value in elem.attrib.items():
+        if local_name(key) == name:
+            return value
+    return None
+
+
+def plain_text(elem):
+    """
+    Testo di una stringa (<si> o <is>): <t> diretto o dei run <r>
+    La formattazione dei run e la fonetica (<rPh>) non fanno parte del valore.
+    """
+    parts = []
+    for child in elem:
+        name = local_name(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name == "r":
+            parts.extend(t.text or "" for t in child if local_name(t.tag) == "t")
+    return "".join(parts)
+
+
+def shared_strings(stream):
+    """Lista delle shared strings come testo semplice"""
+    strings = []
+    for _, elem in ElementTree.iterparse(stream):
+        if local_name(elem.tag) == "si":
+            strings.append(plain_text(elem))
+            elem.clear()
+    return strings
+
+
+def cell_contents(stream, strings):
+    """
+    Sequenza (riferimento, tipo, valore) delle celle con un valore
+    Ignora stili e attributi di formattazione; le shared strings vengono risolte,
+    così l'impronta non dipende dall'ordine in cui l'editor riscrive la tabella.
+    """
+    for _, elem in ElementTree.iterparse(stream):
+        if local_name(elem.tag) != "c":
+            continue
+        kind = elem.get("t", "n")
+        value = None
+        for child in elem:
+            name = local_name(child.tag)
+            if name == "v":
+                value = child.text or ""
+            elif name == "is":
+                value = plain_text(child)
+        if value is not None:
+            if kind == "s":
+                value = strings[int(value)]
+            if kind in ("s", "inlineStr"):
+                kind = "str"
+            yield elem.get("r", ""), kind, value
+        elem.clear()
+
+
+def sheet_fingerprints(excel_file):
+    """
+    {nome_foglio: hash} senza caricare il workbook con openpyxl
+    L'hash copre solo riferimenti, tipi e valori delle celle (shared strings
+    risolte in testo semplice): un salvataggio che riscrive stili, formattazione
+    dei run o ordine delle stringhe non riconverte nulla.
+    """
+    with zipfile.ZipFile(excel_file) as zf:
+        rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        targets = {
+            elem.get("Id"): elem.get("Target")
+            for elem in rels.iter() if local_name(elem.tag) == "Relationship"
+        }
+        workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+
+        strings = []
+        if "xl/sharedStrings.xml" in zf.namelist():
+            with zf.open("xl/sharedStrings.xml") as stream:
+                strings = shared_strings(stream)
+
+        fingerprints = {}
+        for sheet in workbook.iter():
+            if local_name(sheet.tag) != "sheet":
+                continue
+            target = targets[attribute(sheet, "id")]
+            path = target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+            digest = hashlib.sha1()
+            with zf.open(path) as stream:
+                for ref, kind, value in cell_contents(stream, strings):
+                    digest.update("\x00".join((ref, kind, value)).encode() + b"\x01")
+            fingerprints[sheet.get("name")] = digest.hexdigest()
+    return fingerprints
+
+
+class CatalogState:
+    """Stato caldo tra un salvataggio e l'altro: impronte, fogli tipizzati, problemi"""
+
+    def __init__(self, excel_file, output_dir, link_format="wide", indexes=False):
+        self.excel_file = excel_file
+        self.output_dir = output_dir
+        self.link_format = link_format
+        self.indexes = indexes
+        self.fingerprints = {}
+        self.frames = {}
+        self.descriptors = {}
+        self.codes = {}
+        self.issues = {}
+        self.failures = {}
+
+    def refresh(self):
+        """Riconverte i fogli cambiati; ritorna la lista dei fogli riscritti"""
+        fingerprints = sheet_fingerprints(self.excel_file)
+        changed = [
+            sheet_name for sheet_name in SHEETS
+            if sheet_name in fingerprints
+            and fingerprints[sheet_name] != self.fingerprints.get(sheet_name)
+        ]
+        if not changed:
+            return []
+
+        xl = pd.ExcelFile(self.excel_file)
+        codes_changed = False
+        for sheet_name in changed:
+            raw = read_sheet(xl, sheet_name)
+            descriptor = write_csv(fill_placeholders(raw.copy()), sheet_name,
+                                   self.output_dir, self.link_format)
+            if descriptor:
+                self.descriptors[sheet_name] = descriptor
+
+            df, self.failures[sheet_name] = coerce_sheet(raw, sheet_name)
+            self.frames[sheet_name] = df
+
+            codes = frozenset(df["CODICE"].dropna().str.strip()) if "CODICE" in df.columns else frozenset()
+            codes_changed |= codes != self.codes.get(sheet_name)
+            self.codes[sheet_name] = codes
+
+        # Se l'insieme dei CODICE è cambiato, un link altrove può essersi rotto/riparato
+        self.validate(self.frames if codes_changed else changed)
+
+        if self.link_format != "wide":
+            write_links_schema(self.descriptors, self.output_dir, self.link_format)
+        if self.indexes:
+            write_indexes(build_indexes(self.frames), self.output_dir)
+
+        self.fingerprints = fingerprints
+        return changed
+
+    def validate(self, sheet_names):
+        """Ricalcola i link rotti solo per i fogli indicati"""
+        for sheet_name in sheet_names:
+            self.issues[sheet_name] = find_broken_links(
+                self.frames[sheet_name], sheet_name, self.codes
+            )
+
+    def broken_links(self):
+        """Tutti i link rotti correnti"""
+        if not self.issues:
+            return pd.DataFrame(columns=["FOGLIO", "CODICE", "COLONNA", "CODICE_COLLEGATO"])
+        return pd.concat(self.issues.values(), ignore_index=True)
+
+    def schema_failures(self):
+        """Tutte le celle correnti che non rispettano lo schema"""
+        return concat_failures(self.failures.values())
+
+
+class ChangeSignal(FileSystemEventHandler):
+    """Segnala modifiche al solo file del workbook (ignora ~$lock e temporanei)"""
+
+    def __init__(self, excel_file):
+        self.path = os.path.abspath(excel_file)
+        self.event = threading.Event()
+
+    def on_any_event(self, event):
+        paths = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        if self.path in (os.path.abspath(p) for p in paths if p):
+            self.event.set()
+
+
+def wait_for_change(signal, excel_file, last_stat):
+    """Blocca finché il workbook cambia, poi applica il debounce"""
+    if Observer is not None:
+        signal.event.wait()
+        # Debounce: aspetta che gli eventi si fermino per DEBOUNCE_SECONDS
+        while True:
+            signal.event.clear()
+            if not signal.event.wait(DEBOUNCE_SECONDS):
+                break
+        return file_stat(excel_file)
+
+    while True:
+        time.sleep(POLL_SECONDS)
+        stat = file_stat(excel_file)
+        if stat != last_stat:
+            # Debounce: dimensione e mtime stabili per DEBOUNCE_SECONDS
+            time.sleep(DEBOUNCE_SECONDS)
+            if file_stat(excel_file) == stat:
+                return stat
+
+
+def file_stat(excel_file):
+    try:
+        stat = os.stat(excel_file)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def report(state, changed, elapsed):
+    print(f"🔄 {time.strftime('%H:%M:%S')} {len(changed)} fogli aggiornati in {elapsed * 1000:.0f} ms: "
+          f"{', '.join(changed)}")
+    failures = state.schema_failures()
+    if len(failures):
+        print(f"   ⚠️  {len(failures)} celle non valide per lo schema:")
+        for row in failures.head(10).itertuples(index=False):
+            print(f"      {row.FOGLIO}!{row.COLONNA} riga {row.RIGA}: '{row.VALORE}' (atteso {row.ATTESO})")
+    broken = state.broken_links()
+    if len(broken):
+        print(f"   ⚠️  {len(broken)} link verso CODICE inesistenti:")
+        for row in broken.head(10).itertuples(index=False):
+            print(f"      {row.FOGLIO} {row.CODICE}.{row.COLONNA} → {row.CODICE_COLLEGATO}")
+    else:
+        print(f"   ✅ Link validi")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rigenera i CSV a ogni salvataggio del workbook")
+    parser.add_argument("--excel", default=EXCEL_FILE, help="Workbook da osservare")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="Directory dei CSV")
+    parser.add_argument("--link-format", choices=LINK_FORMATS, default="wide",
+                        help="Formato delle famiglie di link nei CSV")
+    parser.add_argument("--indexes", action="store_true",
+                        help=f"Aggiorna anche {INDEXES_FILE}")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    state = CatalogState(args.excel, args.output, args.link_format, args.indexes)
+    signal = ChangeSignal(args.excel)
+
+    if Observer is not None:
+        observer = Observer()
+        observer.schedule(signal, os.path.dirname(os.path.abspath(args.excel)))
+        observer.start()
+        mode = "eventi filesystem"
+    else:
+        mode = f"polling ogni {POLL_SECONDS}s (pip install watchdog per gli eventi)"
+
+    print(f"👀 Watch mode: {args.excel} → {args.output} ({mode})")
+    print(f"   Ctrl+C per uscire\n")
+
+    last_stat = file_stat(args.excel)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                changed = state.refresh()
+            except (zipfile.BadZipFile, KeyError, IndexError, ValueError, OSError) as e:
+                # Salvataggio ancora in corso: si riprova al prossimo evento
+                print(f"   ⏳ Workbook non leggibile ({e}), attendo il prossimo salvataggio")
+            except Exception as e:
+                # Un errore nella rigenerazione non deve fermare il watch mode
+                print(f"   ❌ Rigenerazione fallita ({type(e).__name__}: {e}), "
+                      f"attendo il prossimo salvataggio")
+            else:
+                if changed:
+                    report(state, changed, time.perf_counter() - start)
+            last_stat = wait_for_change(signal, args.excel, last_stat)
+    except KeyboardInterrupt:
+        print(f"\n👋 Watch mode terminato")
+    finally:
+        if Observer is not None:
+            observer.stop()
+            observer.join()
+
+
+if __name__ == "__main__":
+    main()